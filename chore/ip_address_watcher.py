@@ -67,7 +67,8 @@ class IPAddressWatcherApp(App):
 
     def update_log(self, dt):
         current_time = get_jst_str()
-        ipv4, ipv6 = _get_public_ips()
+        # アドレス変化の検出が目的のため、キャッシュを使わず毎回取得する
+        ipv4, ipv6 = _get_public_ips(force_refresh=True)
         self.current_ipv4_label.text = f"IPv4: {ipv4}"
         self.current_ipv6_label.text = f"IPv6: {ipv6}"
 
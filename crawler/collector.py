@@ -26,14 +26,23 @@ def execute():
     folder_list = []  # 「.process」ファイルを含む証拠フォルダパスのリスト
 
     # フォルダ内のすべてのサブフォルダをチェック
-    for root, dirs, files in os.walk(EVI_FOLDER):
-        # 各ファイルに対してチェック
-        for file in files:
-            # ファイル名が「.process」であるかどうかを確認
-            if file == ".process":
-                # 「.process」ファイルを含むフォルダパスを証拠採取の対象リストに追加
-                folder_list.append(root)
-                break
+    # os.walkと違い、os.scandirはエントリ種別をディレクトリエントリから
+    # 直接判定できるため、フォルダごとの余分なstat呼び出しを行わない
+    stack = [EVI_FOLDER]
+    while stack:
+        current = stack.pop()
+        found = False
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif not found and entry.name == ".process":
+                        # 「.process」ファイルを含むフォルダパスを証拠採取の対象リストに追加
+                        folder_list.append(current)
+                        found = True
+        except OSError:
+            continue  # 読み取れないフォルダはスキップ
 
     source_files = []  # 証拠採取の対象とする「source.torrent」ファイルへのパスを格納するリスト
 
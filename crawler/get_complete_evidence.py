@@ -38,7 +38,8 @@ def get_info_hash(torrent_file):
 
     info = torrent_data[b"info"]
     info_bencoded = bencodepy.encode(info)
-    info_hash = hashlib.sha1(info_bencoded).hexdigest()
+    # info_hashは識別子であり暗号用途ではないため、OpenSSLの高速な実装に委ねる
+    info_hash = hashlib.sha1(info_bencoded, usedforsecurity=False).hexdigest()
 
     return info_hash
 
@@ -316,10 +316,13 @@ def scraper(url, file_path):
                                     new_folder = os.path.join(
                                         EVI_FOLDER, "tor", f"{folder_time}"
                                     )
-                                    if not os.path.exists(
-                                        new_folder
-                                    ):  # フォルダが存在しない場合は作成
+                                    try:
+                                        # 存在チェックを挟まず、作成の成否で新規フォルダかを判定する
                                         os.makedirs(new_folder)
+                                    except FileExistsError:
+                                        os.unlink(temp_file_path)
+                                        logger.warning("フォルダが既に存在します：\n" + new_folder)
+                                    else:
                                         logger.info("新しく作成されたフォルダ：\n" + new_folder)
 
                                         new_file_name = os.path.join(
@@ -358,9 +361,6 @@ def scraper(url, file_path):
                                             )
                                             with open(r18_file_path, "w") as f:
                                                 pass
-                                    else:
-                                        os.unlink(temp_file_path)
-                                        logger.warning("フォルダが既に存在します：\n" + new_folder)
         if last_timestamp > last_crawl_time:
             # ページ内末尾のタイムスタンプで確認し、巡回したことがなさそうであれば次のページへ
             page += 1
@@ -0,0 +1,79 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from torrent.client import _make_peers_list
+
+
+class FakePeer:
+    """_make_peers_listに渡すpeer_info相当のオブジェクト。"""
+
+    def __init__(self, ip, port, valid, timestamp):
+        self.ip = (ip, port)
+        self.valid = valid
+        self.timestamp = timestamp
+
+
+class TestMakePeersList(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, "peers_test.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_rows(self):
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_new_peer_is_appended(self):
+        _make_peers_list([FakePeer("192.0.2.1", 6881, True, "t1")], self.csv_path)
+
+        rows = self.read_rows()
+        self.assertEqual(
+            rows, [["192.0.2.1", "6881", "未取得", "未取得", "1", "t1", "t1"]]
+        )
+
+    def test_existing_peer_is_updated(self):
+        _make_peers_list([FakePeer("192.0.2.1", 6881, True, "t1")], self.csv_path)
+        _make_peers_list([FakePeer("192.0.2.1", 6881, True, "t2")], self.csv_path)
+
+        rows = self.read_rows()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][4], "2")
+        self.assertEqual(rows[0][5], "t1")  # 初回取得時刻は維持される
+        self.assertEqual(rows[0][6], "t2")
+
+    def test_invalid_piece_does_not_increment(self):
+        _make_peers_list([FakePeer("192.0.2.1", 6881, True, "t1")], self.csv_path)
+        _make_peers_list([FakePeer("192.0.2.1", 6881, False, "t2")], self.csv_path)
+
+        rows = self.read_rows()
+        self.assertEqual(rows[0][4], "1")
+        self.assertEqual(rows[0][6], "t2")
+
+    def test_repeated_peer_in_one_batch(self):
+        log = [
+            FakePeer("192.0.2.1", 6881, True, "t1"),
+            FakePeer("192.0.2.1", 6881, True, "t2"),
+        ]
+        _make_peers_list(log, self.csv_path)
+
+        rows = self.read_rows()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][4], "2")
+        self.assertEqual(rows[0][6], "t2")
+
+    def test_same_ip_different_port_gets_own_row(self):
+        log = [
+            FakePeer("192.0.2.1", 6881, True, "t1"),
+            FakePeer("192.0.2.1", 6882, True, "t1"),
+        ]
+        _make_peers_list(log, self.csv_path)
+
+        self.assertEqual(len(self.read_rows()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
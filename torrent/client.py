@@ -1,6 +1,8 @@
 # 標準ライブラリ
+import concurrent.futures
 import csv
 from datetime import datetime
+import functools
 import ipaddress
 from ipaddress import ip_address, ip_network
 import json
@@ -10,12 +12,15 @@ import re
 import shutil
 import socket
 import tempfile
+import threading
 import time
 import urllib.parse
 
 # サードパーティライブラリ
 import libtorrent as lt
+import pytricia
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 # 独自モジュール
@@ -36,6 +41,12 @@ class Client:
         self.REMOTE_HOST = con.REMOTE_HOST
         self.logger = logging.getLogger(__name__)
 
+        # セッションの生成はソケットのバインドやスレッド起動を伴うため、
+        # メソッド呼び出しごとに作り直さず、インスタンスで1つを使い回す
+        self.session = lt.session(
+            {"listen_interfaces": f"0.0.0.0:{self.MY_PORT},[::]:{self.MY_PORT}"}
+        )
+
     def download(self, torrent_path: str, save_path: str) -> None:
         """
         指定した.torrentファイルをもとに本体ファイルをダウンロードする。
@@ -47,7 +58,7 @@ class Client:
         save_path : str
             本体ファイルのダウンロード先のパス。
         """
-        info = lt.torrent_info(torrent_path)  # 当該証拠フォルダ内にあるsource.torrentの情報
+        info = _torrent_info(torrent_path)  # 当該証拠フォルダ内にあるsource.torrentの情報
         target_file_path = os.path.join(save_path, info.name())  # ダウンロード対象ファイルのパス
         new_file = True
 
@@ -57,55 +68,62 @@ class Client:
             self.logger.info("本体ファイル" + target_file_path + "の状態を確認中...")
             new_file = False
 
-        # 設定ファイルで指定したポートをリスナーに設定し、セッションを開始
-        session = lt.session(
-            {"listen_interfaces": f"0.0.0.0:{self.MY_PORT},[::]:{self.MY_PORT}"}
-        )
+        # インスタンスで共有しているセッションを利用する
+        session = self.session
+
+        # get_peer_logが設定したIPフィルタを引き継がないよう、空のフィルタに戻す
+        session.set_ip_filter(lt.ip_filter())
 
         # 本体ファイルのダウンロ－ドを開始
         handle = session.add_torrent({"ti": info, "save_path": save_path})
         handle.set_upload_limit(self.MAX_UPLOAD_LIMIT)
 
-        # 進捗を追跡する変数
-        last_downloaded = 0
-
-        # 現在の時刻を記録
-        last_time = time.time()
-
-        while not handle.status().is_seeding:
-            current_status = handle.status()
-            if new_file:
-                _print_download_status(current_status, self.logger)
-
-            # 現在の進捗を取得
-            current_downloaded = current_status.total_done
-
-            # 現在の時刻を取得
-            current_time = time.time()
-
-            # 経過時間を確認
-            if current_time - last_time >= 30:
-                # 進捗があるかどうかを確認
-                if current_downloaded == last_downloaded:
-                    self.logger.info("ダウンロードが進捗していないため、スキップします。")
-                    return False
-
-                # 進捗と時刻を更新
-                last_downloaded = current_downloaded
-                last_time = current_time
-
-            time.sleep(5)
-
-        self.logger.info("ダウンロード済み： %s", info.name())
-        self.logger.info(
-            "ハッシュ: %s, ファイルサイズ: %.2f MB, 時刻: %s"
-            % (
-                handle.info_hash(),
-                info.total_size() / 1048576,  # バイトをメガバイトに変換
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        try:
+            # 進捗を追跡する変数
+            last_downloaded = 0
+
+            # 現在の時刻を記録
+            last_time = time.time()
+
+            while not handle.status().is_seeding:
+                current_status = handle.status()
+                if new_file:
+                    _print_download_status(current_status, self.logger)
+
+                # 現在の進捗を取得
+                current_downloaded = current_status.total_done
+
+                # 現在の時刻を取得
+                current_time = time.time()
+
+                # 経過時間を確認
+                if current_time - last_time >= 30:
+                    # 進捗があるかどうかを確認
+                    if current_downloaded == last_downloaded:
+                        self.logger.info("ダウンロードが進捗していないため、スキップします。")
+                        return False
+
+                    # 進捗と時刻を更新
+                    last_downloaded = current_downloaded
+                    last_time = current_time
+
+                # 固定のスリープではなく、セッションに動きがあるまで待機する（最長5秒）
+                session.wait_for_alert(5000)
+                session.pop_alerts()  # 共有セッションのアラートキューを溜めない
+
+            self.logger.info("ダウンロード済み： %s", info.name())
+            self.logger.info(
+                "ハッシュ: %s, ファイルサイズ: %.2f MB, 時刻: %s"
+                % (
+                    handle.info_hash(),
+                    info.total_size() / 1048576,  # バイトをメガバイトに変換
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                )
             )
-        )
-        return True
+            return True
+        finally:
+            # セッションは共有のため、トレントを外して次の呼び出しに状態を持ち越さない
+            session.remove_torrent(handle)
 
     def get_peer_log(
         self, torrent_path: str, max_list_size: int = 20
@@ -126,18 +144,16 @@ class Client:
         peers : list of (str, int)
             ピアのリスト。
         """
-        session = lt.session(
-            {"listen_interfaces": f"0.0.0.0:{self.MY_PORT},[::]:{self.MY_PORT}"}
-        )
+        # インスタンスで共有しているセッションを利用する
+        session = self.session
 
-        info = lt.torrent_info(torrent_path)
+        info = _torrent_info(torrent_path)
 
         # 自分のIPを取得する_get_public_ips()を呼び出し、結果を2つの変数に格納
         ipv4, ipv6 = _get_public_ips()
 
         # 自分のIPアドレスの、最初の4つのセクションを取得して除外リストに追加
-        if ipv6:
-            excluded_ipv6_network = get_excluded_ipv6(ipv6)
+        excluded_ipv6_network = get_excluded_ipv6(ipv6) if ipv6 else None
 
         # 設定ファイル（ipv4.txt, ipv6.txt）で指定した範囲のみ許可する
         ipv4_ranges = load_ip_ranges(4)
@@ -163,6 +179,9 @@ class Client:
                 ip_filter.add_rule(ipv6, ipv6, 1)
 
             session.set_ip_filter(ip_filter)
+        else:
+            # 共有セッションに前回呼び出しのIPフィルタが残らないよう、空のフィルタに戻す
+            session.set_ip_filter(lt.ip_filter())
 
         # ピア情報の取得時に使う一時フォルダの格納場所を、TORRENT_FOLDER内に作成
         torrent_folder = os.path.dirname(torrent_path)
@@ -174,12 +193,22 @@ class Client:
         if not os.path.exists(tmp_path):  # 再生成
             os.makedirs(tmp_path, exist_ok=True)
 
-        peers: list[tuple[str, int]] = []  # 判定用にピアのIP（p.ip）だけを格納するリスト
-        RETRY_COUNTER = 10
+        # 判定用に(IPアドレス, ポート番号)をひとつの整数に詰めたキーを格納するセット
+        peers: set[int] = set()
+        seen_ips: set[int] = set()  # ポート番号を問わない、IPアドレス単位の重複判定用
+        RETRY_TIMEOUT = 30  # ピア探索を続けるおおよその秒数（従来の10回×3秒スリープに相当）
         log = []
+        handle = None
 
         try:
             with tempfile.TemporaryDirectory(prefix="tmp", dir=tmp_path) as tmpdir:
+                # 共有セッションではdownloadが外した同一トレントの削除が非同期に
+                # 進むため、完了を待ってから追加する（重複追加のエラーを防ぐ）
+                for _ in range(50):
+                    if not session.find_torrent(info.info_hash()).is_valid():
+                        break
+                    time.sleep(0.1)
+
                 # 一時ファイルとして対象ファイルを作成し、ダウンロードの進捗0％からスタート
                 handle = session.add_torrent({"ti": info, "save_path": tmpdir})
                 handle.set_upload_limit(
@@ -188,15 +217,17 @@ class Client:
 
                 valid_piece = True  # 破損ピースが検出されていなければTrue
 
-                # アラートをポーリングして、破損したピースがあるかチェック
-                alerts = session.pop_alerts()
-                for alert in alerts:
-                    if isinstance(alert, lt.hash_failed_alert):
-                        valid_piece = False
-                        break
-
+                # アラートの多発で周回が早回りしてもピア探索時間が縮まないよう、
+                # 回数ではなく経過時間で打ち切りを判定する
+                deadline = time.monotonic() + RETRY_TIMEOUT
                 cnt = 0
-                while cnt < RETRY_COUNTER:
+                while time.monotonic() < deadline:
+                    # 届いたアラートを確認し、破損したピースがあるかチェック
+                    for alert in session.pop_alerts():
+                        if isinstance(alert, lt.hash_failed_alert):
+                            valid_piece = False
+                            break
+
                     try:
                         peer_info_list = handle.get_peer_info()  # 接続済みピアの情報を取得
                         timestamp = ut.get_jst_str()
@@ -205,14 +236,20 @@ class Client:
                             if not p.seed:
                                 continue  # シーダーでなければ収録しない
 
-                            key = (p.ip[0], p.ip[1])
+                            peer_ip = p.ip[0]
+
+                            # ピアごとにIPアドレスのパースは一度だけ行う
+                            peer_ip_obj = ip_address(peer_ip)
+                            peer_ip_int = int(peer_ip_obj)
+
+                            # IPアドレスとポート番号をひとつの整数に詰めた重複判定キー
+                            key = (peer_ip_int << 16) | p.ip[1]
                             if key in peers and p.last_active == 0:
                                 p.timestamp = timestamp
                                 p.valid = valid_piece
                                 log.append(p)
                                 continue  # すでに存在するピアは、最終接続時刻（int秒前）が0なら追加収録
 
-                            peer_ip = p.ip[0]
                             if peer_ip == ipv4 or peer_ip == ipv6:
                                 continue  # 自分自身のIPと一致する場合は収録しない
 
@@ -220,32 +257,31 @@ class Client:
                                 continue  # 最終接続時刻が0秒前で、10KB/s以上のUP速度があるピアのみ収録
 
                             # IPアドレスが同じでポート番号が異なるピアは、同じ周回では重複して収録しない
-                            if any(peer[0] == peer_ip for peer in peers):
+                            if peer_ip_int in seen_ips:
                                 continue
 
                             if add_all_peers:  # IP範囲を問わず、シーダーをすべて収録する場合
-                                if p.ip not in peers:
-                                    p.timestamp = timestamp
-                                    p.valid = valid_piece
-                                    log.append(p)
-                                    peers.append(p.ip)
-                                    continue
+                                p.timestamp = timestamp
+                                p.valid = valid_piece
+                                log.append(p)
+                                peers.add(key)
+                                seen_ips.add(peer_ip_int)
+                                continue
 
-                            if ip_address(peer_ip).version == 4:  # IPv4アドレスの場合
-                                if p.ip not in peers and _ip_in_range(
-                                    peer_ip, ipv4_ranges
-                                ):
+                            if peer_ip_obj.version == 4:  # IPv4アドレスの場合
+                                if _ip_in_range(peer_ip, ipv4_ranges):
                                     p.timestamp = timestamp
                                     p.valid = valid_piece
                                     log.append(p)
-                                    peers.append(p.ip)
+                                    peers.add(key)
+                                    seen_ips.add(peer_ip_int)
 
-                            elif ip_address(peer_ip).version == 6:
+                            elif peer_ip_obj.version == 6:
                                 # excluded_ipv6_networkがNoneでないかどうかを確認
                                 is_not_in_self_network = True
                                 if excluded_ipv6_network is not None:
                                     is_not_in_self_network = (
-                                        ip_address(peer_ip) not in excluded_ipv6_network
+                                        peer_ip_obj not in excluded_ipv6_network
                                     )
 
                                 # その他の条件と組み合わせる
@@ -255,12 +291,13 @@ class Client:
                                     p.timestamp = timestamp
                                     p.valid = valid_piece
                                     log.append(p)
-                                    peers.append(p.ip)
+                                    peers.add(key)
+                                    seen_ips.add(peer_ip_int)
                     except Exception as e:
                         self.logger.warning(f"ループ中に例外が発生: {e}")
 
                     cnt += 1
-                    if len(peers) == max_list_size:
+                    if len(peers) >= max_list_size:
                         self.logger.info("取得ピア数の上限に達しました。")
                         break
 
@@ -270,7 +307,8 @@ class Client:
                         )
                         break
 
-                    time.sleep(3)
+                    # 固定のスリープではなく、アラートが届くまで待機する（最長3秒）
+                    session.wait_for_alert(3000)
 
         except Exception:
             try:
@@ -281,7 +319,9 @@ class Client:
             except Exception as e:
                 logging.warning(f"一時ファイルの削除に失敗しました: {e}")
 
-        session.remove_torrent(handle)  # ログ書き込み処理の前に、ダウンロード・アップロードを完全に停止
+        if handle is not None:
+            # ログ書き込み処理の前に、ダウンロード・アップロードを完全に停止
+            session.remove_torrent(handle)
 
         logging.info("取得ピア数：" + str(len(peers)) + "　ログを記録しています...")
         if log:
@@ -311,6 +351,17 @@ def _load_peer_setting():
         return False
 
 
+@functools.lru_cache(maxsize=64)
+def _cached_torrent_info(torrent_path: str, mtime_ns: int):
+    # mtime_nsは、ファイルが更新された場合にキャッシュを無効化するためのキー
+    return lt.torrent_info(torrent_path)
+
+
+def _torrent_info(torrent_path: str):
+    # .torrentファイルのbdecodeとinfo_hash計算を、同一ファイルに対して繰り返さない
+    return _cached_torrent_info(torrent_path, os.stat(torrent_path).st_mtime_ns)
+
+
 def _default_ip_filter(torrent_path: str) -> tuple:
     # IPフィルタを作成
     ip_filter = lt.ip_filter()
@@ -318,35 +369,60 @@ def _default_ip_filter(torrent_path: str) -> tuple:
     ip_filter.add_rule("0.0.0.0", "255.255.255.255", 1)
     ip_filter.add_rule("::", "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff", 1)
 
-    # torrentファイルを読み込む
-    info = lt.torrent_info(torrent_path)
+    # torrentファイルを読み込む（パース結果はキャッシュされる）
+    info = _torrent_info(torrent_path)
 
     # トラッカーの一覧を取得
     trackers = info.trackers()
 
-    # 各トラッカーのIPアドレスを取得し、許可リストに追加
+    # 各トラッカーのホスト名を、重複を除いて取得
+    hosts = set()
     for tracker in trackers:
-        url = tracker.url
-        parsed_url = urllib.parse.urlparse(url)
-        hostname = parsed_url.hostname
-        port = parsed_url.port
-        try:
-            addr_infos = socket.getaddrinfo(hostname, port)
+        parsed_url = urllib.parse.urlparse(tracker.url)
+        if parsed_url.hostname:
+            hosts.add((parsed_url.hostname, parsed_url.port))
+
+    # DNS解決を並列に実行し、待ち時間を各解決の合計ではなく最長のものに抑える
+    if hosts:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda host: _resolve_tracker(*host), hosts))
+
+        # 解決できたトラッカーのIPアドレスを許可リストに追加
+        for addr_infos in results:
             for family, type, proto, canonname, sockaddr in addr_infos:
                 tracker_ip = sockaddr[0]
                 ip_filter.add_rule(tracker_ip, tracker_ip, 0)
-        except socket.gaierror:
-            # ホスト名を解決できない場合、スキップ
-            pass
     return ip_filter
 
 
+# トラッカーのDNS解決結果のキャッシュ。(hostname, port)をキーに(解決結果, 取得時刻)を保持する
+_tracker_addr_cache: dict = {}
+_TRACKER_ADDR_TTL = 900  # トラッカーのIPアドレスを再解決するまでの秒数
+
+
+def _resolve_tracker(hostname, port) -> list:
+    # 有効期限内に解決済みのホストは、キャッシュから返す
+    cached = _tracker_addr_cache.get((hostname, port))
+    if cached is not None and time.monotonic() - cached[1] < _TRACKER_ADDR_TTL:
+        return cached[0]
+
+    try:
+        addr_infos = socket.getaddrinfo(hostname, port)
+    except socket.gaierror:
+        # ホスト名を解決できない場合、スキップ
+        addr_infos = []
+
+    _tracker_addr_cache[(hostname, port)] = (addr_infos, time.monotonic())
+    return addr_infos
+
+
 def _add_ip_ranges_to_filter(ip_filter, ip_ranges, allow=True):
     # IPフィルタに範囲を追加する関数
-    for ip_range in ip_ranges:
-        # IPアドレス範囲の開始と終了を取得
-        start = str(ip_range[0])
-        end = str(ip_range[-1])
+    for prefix in ip_ranges:
+        # トライに格納されたCIDR表記から、IPアドレス範囲の開始と終了を取得
+        network = ip_network(prefix, strict=False)
+        start = str(network[0])
+        end = str(network[-1])
         # 許可する場合は0、禁止する場合は1を使用
         ip_filter.add_rule(start, end, 0 if allow else 1)
 
@@ -359,16 +435,17 @@ def _save_peer_log(
     csv_path = os.path.join(save_path, csv_name)
 
     # ログの生データを記録
-    for p in log:
-        peer = p.ip
-        _make_peers_list(peer, p.timestamp, p.valid, csv_path)
+    _make_peers_list(log, csv_path)
 
     # ピア別のログ記録
-    for p in log:
-        peers_folder = os.path.join(save_path, "peers")
-        if not os.path.exists(peers_folder):
-            os.makedirs(peers_folder, exist_ok=True)
+    peers_folder = os.path.join(save_path, "peers")
+    os.makedirs(peers_folder, exist_ok=True)
+
+    # 同じピアの行をまとめ、ファイルごとに1回の書き込みで済むようグループ化する
+    pending: dict[str, list[str]] = {}
+    headers: dict[str, str] = {}
 
+    for p in log:
         # peer_infoオブジェクトの値を文字列に変換
         port = str(p.ip[1])
         client = p.client.decode("utf-8")
@@ -389,26 +466,31 @@ def _save_peer_log(
         )
 
         peer_file_path = os.path.join(peers_folder, peer_file_name)
-        if not os.path.exists(peer_file_path):
-            file_mode = "w"
-        else:
-            file_mode = "a"
-
-        with open(peer_file_path, file_mode, encoding="utf-8") as f:
-            if file_mode == "w":
-                # 新規ファイルの場合はヘッダーを書き込み
-                f.write(f"IPアドレス：{p.ip[0]}\n")
-                f.write(f"ポート番号：{port}\n")
-                f.write(f"クライアント：{client}\n")
-                f.write("プロバイダ：未取得\n")
-                f.write("リモートホスト：未取得\n")
-                f.write(f"ファイル名：{info.name()}\n")
-                f.write(f"ファイルハッシュ: {info.info_hash()}\n")
-                f.write(f"証拠収集開始時刻: {p.timestamp}\n")
-                f.write(f"P2Pクローラ {version}\n")
-                f.write("------------------------------------\n")
-
-            f.write(log_line)
+
+        if peer_file_path not in pending:
+            pending[peer_file_path] = []
+            # 新規ファイルだった場合に書き込むヘッダー（最初のログ行の情報を使う）
+            headers[peer_file_path] = (
+                f"IPアドレス：{p.ip[0]}\n"
+                f"ポート番号：{port}\n"
+                f"クライアント：{client}\n"
+                "プロバイダ：未取得\n"
+                "リモートホスト：未取得\n"
+                f"ファイル名：{info.name()}\n"
+                f"ファイルハッシュ: {info.info_hash()}\n"
+                f"証拠収集開始時刻: {p.timestamp}\n"
+                f"P2Pクローラ {version}\n"
+                "------------------------------------\n"
+            )
+
+        pending[peer_file_path].append(log_line)
+
+    for peer_file_path, lines in pending.items():
+        # 存在チェックを挟まず追記モードで開き、空ファイルの場合のみヘッダーを書き込む
+        with open(peer_file_path, "a", encoding="utf-8", buffering=65536) as f:
+            if f.tell() == 0:
+                f.write(headers[peer_file_path])
+            f.write("".join(lines))
 
     if not add_all_pears:
         _write_provider(csv_path, remote_host_path)
@@ -451,63 +533,62 @@ def _print_download_status(torrent_status, logger: logging.Logger) -> None:
     )
 
 
-def _make_peers_list(
-    peer: tuple[str, int], timestamp: str, valid_piece: bool, csv_path: str
-) -> None:
+def _make_peers_list(log, csv_path: str) -> None:
     """
     ピアの一覧をファイルに記録または更新する。
 
+    既存の記録ファイルを一度だけ読み込み、ログ内のすべてのピアを
+    メモリ上で反映したうえで一括で書き戻す。
+
     Parameters
     ----------
-    peer : (str, int)
-        ピアを表すタプル。
-    timestamp : str
-        完了タイムスタンプ。
-    valid_piece : bool
-        取得できたのが正常なピースかどうか。
+    log : list of peer_info
+        タイムスタンプとピース正否を付与済みのピア情報のリスト。
     csv_path : str
         記録ファイルのパス。
     """
     provider = "未取得"
     remote_host = "未取得"
-    num = 1 if valid_piece else 0
-    updated = False
 
-    new_data = []
+    rows: list[list[str]] = []
+    # (IPアドレス, ポート番号)から行を引くための索引
+    row_index: dict[tuple[str, str], list[str]] = {}
 
     try:
         if os.path.exists(csv_path):
-            with open(csv_path, "r+", newline="", encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if row[:2] == [peer[0], str(peer[1])]:
-                        row[4] = str(int(row[4]) + num) if valid_piece else row[4]
-                        row[6] = timestamp
-                        updated = True
-                    new_data.append(row)
-
-                f.seek(0)  # ファイルポインタを先頭に戻す
-                f.truncate()  # ファイル内容を削除
-
-                writer = csv.writer(f)
-                for row in new_data:
-                    writer.writerow(row)
-
-                if not updated:
-                    # ピアが新規である場合は追加
-                    writer.writerow(
-                        peer + (provider, remote_host, num, timestamp, timestamp)
-                    )
-        else:
-            with open(csv_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    peer + (provider, remote_host, num, timestamp, timestamp)
-                )
+            with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    rows.append(row)
+                    row_index[(row[0], row[1])] = row
+
+        for p in log:
+            peer = p.ip
+            num = 1 if p.valid else 0
+            key = (peer[0], str(peer[1]))
+            if key in row_index:
+                row = row_index[key]
+                row[4] = str(int(row[4]) + num) if p.valid else row[4]
+                row[6] = p.timestamp
+            else:
+                # ピアが新規である場合は追加
+                row = [
+                    peer[0],
+                    str(peer[1]),
+                    provider,
+                    remote_host,
+                    str(num),
+                    p.timestamp,
+                    p.timestamp,
+                ]
+                rows.append(row)
+                row_index[key] = row
+
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(rows)
 
     except PermissionError:
         logger.warning("パーミッションエラー：ピア履歴のcsvに書き込みできません。ファイルが開かれている場合は閉じてください。")
-        return False  # download_pieceを中断するための戻り値
+        return False  # 呼び出し元の処理を中断するための戻り値
 
 
 def _get_provider(remote_host, remote_host_path):
@@ -533,25 +614,31 @@ def _write_provider(csv_path, remote_host_path):
         if row[2] != "未取得":
             processed_ips[ip_address] = (row[2], row[3])
 
+    # 未処理のIPアドレスを重複なく集める
+    pending_ips = []
     for row in rows:
         ip_address = row[0]
-        if ip_address not in processed_ips:  # 未処理のIPアドレスの場合のみ処理
-            if row[2] == "未取得":  # リモートホストが未取得の場合のみ処理
-                # リモートホストの取得
-                remote_host = _get_remote_host(ip_address)
-                row[2] = remote_host if remote_host else "取得失敗"
-
-                # プロバイダ名の取得
-                if remote_host and remote_host != "取得失敗":
-                    provider = _get_provider(remote_host, remote_host_path)
-                    row[3] = provider if provider else _query_jpnic_whois(ip_address)
-                else:
-                    row[3] = _query_jpnic_whois(ip_address)
-
-                processed_ips[ip_address] = (row[2], row[3])
-            else:
-                # 既にリモートホストが取得されている場合は、処理済みの情報を使用
-                row[2], row[3] = processed_ips[ip_address]
+        if (
+            ip_address not in processed_ips
+            and row[2] == "未取得"  # リモートホストが未取得の場合のみ処理
+            and ip_address not in pending_ips
+        ):
+            pending_ips.append(ip_address)
+
+    # リモートホストとプロバイダ名の解決を並列に行う
+    if pending_ips:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = executor.map(
+                lambda ip: _resolve_peer_provider(ip, remote_host_path), pending_ips
+            )
+        for ip_address, result in zip(pending_ips, results):
+            processed_ips[ip_address] = result
+
+    # 処理済みの情報を各行に反映する
+    for row in rows:
+        ip_address = row[0]
+        if ip_address in processed_ips:
+            row[2], row[3] = processed_ips[ip_address]
 
     # 処理したデータをCSVファイルに書き込む
     with open(csv_path, mode="w", newline="", encoding="utf-8") as file:
@@ -579,6 +666,22 @@ def _write_provider(csv_path, remote_host_path):
                             log_file.truncate()  # ファイルの末尾を現在の位置で切り捨てる
 
 
+def _resolve_peer_provider(ip_address, remote_host_path):
+    # 1つのIPアドレスについて、リモートホストとプロバイダ名を解決する
+    remote_host = _get_remote_host(ip_address)
+
+    if remote_host and remote_host != "取得失敗":
+        provider = _get_provider(remote_host, remote_host_path)
+        if not provider:
+            provider = _query_jpnic_whois(ip_address)
+    else:
+        remote_host = "取得失敗"
+        provider = _query_jpnic_whois(ip_address)
+
+    return remote_host, provider
+
+
+@functools.lru_cache(maxsize=8)
 def get_excluded_ipv6(ipv6):
     # IPv6アドレスの第4セグメントまでを抽出する関数
     ipv6_segments = ipv6.split(":")[:4]  # IPv6アドレスの最初の4つのセグメントを取得
@@ -610,8 +713,25 @@ def is_segment_in_peers(ipv6, peers_list):
     return False
 
 
-def load_ip_ranges(version: int) -> list:
-    # IP範囲をファイルから読み込む
+@functools.lru_cache(maxsize=4)
+def _cached_ip_ranges(
+    ip_range_file: str, version: int, mtime_ns: int
+) -> pytricia.PyTricia:
+    # mtime_nsは、範囲ファイルが書き換えられた場合にキャッシュを無効化するためのキー
+    ip_ranges = pytricia.PyTricia(32 if version == 4 else 128)
+
+    with open(ip_range_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                ip_ranges.insert(line, True)
+
+    return ip_ranges
+
+
+def load_ip_ranges(version: int) -> pytricia.PyTricia:
+    # IP範囲をファイルから読み込み、Patriciaトライに格納する
+    # 範囲ファイルは定期巡回で書き換えられるため、更新時刻をキーにキャッシュする
     current_dir = os.path.dirname(os.path.abspath(__file__))
     con = Config(base_path=current_dir, level=1)
 
@@ -622,17 +742,14 @@ def load_ip_ranges(version: int) -> list:
     )
 
     if not os.path.exists(ip_range_file):
-        return []
-
-    with open(ip_range_file, "r") as f:
-        ip_ranges = [
-            ipaddress.ip_network(line.strip(), strict=False) for line in f.readlines()
-        ]
+        return pytricia.PyTricia(32 if version == 4 else 128)
 
-    return ip_ranges
+    return _cached_ip_ranges(
+        ip_range_file, version, os.stat(ip_range_file).st_mtime_ns
+    )
 
 
-def _ip_in_range(ip: str, ip_ranges: list) -> bool:
+def _ip_in_range(ip: str, ip_ranges: pytricia.PyTricia) -> bool:
     """
     指定されたIPアドレスが、設定ファイル（ipv4.txt, ipv6.txt）の範囲に収まっているかを返す。
 
@@ -640,21 +757,15 @@ def _ip_in_range(ip: str, ip_ranges: list) -> bool:
     ----------
     ip : str
         判定対象のIPアドレス。
-    ip_ranges : list
-        load_ip_rangesで取得したIPアドレス範囲の設定。
+    ip_ranges : pytricia.PyTricia
+        load_ip_rangesで取得したIPアドレス範囲のトライ。
     """
     try:
-        ip_obj = ipaddress.ip_address(ip)
+        return ip in ip_ranges
     except ValueError:
         logger.warning(f"{ip} はIPアドレスとして不正な形式です。")
         return False
 
-    for ip_range in ip_ranges:
-        if ip_obj in ip_range:
-            return True
-
-    return False
-
 
 def _get_remote_host(ip_address):
     try:
@@ -673,19 +784,44 @@ def _get_remote_host(ip_address):
         return "取得失敗"
 
 
-def _get_public_ips() -> tuple[str, str]:
+# _get_public_ipsの結果のキャッシュ。(ipv4, ipv6, 取得時刻)のタプルを保持する
+_public_ips_cache: tuple | None = None
+_PUBLIC_IPS_TTL = 900  # 自分のIPを再取得するまでの秒数
+
+# 接続とTLSハンドシェイクを呼び出しをまたいで使い回すための共有HTTPセッション
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+
+def _get_public_ips(force_refresh: bool = False) -> tuple[str, str]:
     """
     現在のIPv4とIPv6アドレスを取得する。
 
+    取得結果は_PUBLIC_IPS_TTL秒間キャッシュされ、期間内の再呼び出しでは
+    ネットワークアクセスを行わない。
+
+    Parameters
+    ----------
+    force_refresh : bool
+        Trueの場合、キャッシュを無視して必ず再取得する。
+        IPアドレスの変化そのものを監視する用途で使用する。
+
     Returns
     -------
     tuple:
         現在のIPv4, IPv6アドレスのタプル。
     """
+    global _public_ips_cache
+
+    if not force_refresh and _public_ips_cache is not None:
+        ipv4, ipv6, fetched_at = _public_ips_cache
+        if time.monotonic() - fetched_at < _PUBLIC_IPS_TTL:
+            return ipv4, ipv6
+
     ipv4, ipv6 = None, None
     # IPv4アドレスの取得
     try:
-        response_ipv4 = requests.get("https://api.ipify.org?format=json")
+        response_ipv4 = _HTTP.get("https://api.ipify.org?format=json", timeout=5)
         response_ipv4.raise_for_status()
         ipv4 = response_ipv4.json().get("ip")
         time.sleep(1)
@@ -694,45 +830,112 @@ def _get_public_ips() -> tuple[str, str]:
 
     # IPv6アドレスの取得
     try:
-        response_ipv6 = requests.get("https://api6.ipify.org?format=json")
+        response_ipv6 = _HTTP.get("https://api6.ipify.org?format=json", timeout=5)
         response_ipv6.raise_for_status()
         ipv6 = response_ipv6.json().get("ip")
     except RequestException as e:
         logger.warning(f"IPv6の取得に失敗しました: {e}")
 
+    # どちらも取得できなかった場合はキャッシュせず、次回の呼び出しで再試行する
+    if ipv4 is not None or ipv6 is not None:
+        _public_ips_cache = (ipv4, ipv6, time.monotonic())
+
     return ipv4, ipv6
 
 
-def _query_jpnic_whois(ip_address):
-    # JPNICのWHOISサービスに接続
-    whois_server = "whois.nic.ad.jp"
-    whois_port = 43
+# WHOISで取得済みの組織名のキャッシュ。IPアドレスをキーとする
+# 並列に解決される場合があるため、読み込みと保存はロックで保護する
+_WHOIS_CACHE: dict[str, str] = {}
+_whois_cache_loaded = False
+_whois_lock = threading.Lock()
+
+# WHOISサーバーへの問い合わせそのものを直列化するためのロック。
+# クエリ後のsleepによるレート制限を、並列解決時にも維持する
+_whois_query_lock = threading.Lock()
+
+# 組織名を抽出する正規表現（問い合わせごとの再コンパイルを避けるためモジュールレベルに置く）
+_ORG_RE = re.compile(r"\[組織名\]\s+(.+)")
+
+
+def _whois_cache_path() -> str:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    con = Config(base_path=current_dir, level=1)
+    return os.path.join(con.SETTING_FOLDER, "whois_cache.json")
+
 
+def _load_whois_cache() -> None:
+    # キャッシュファイルを初回呼び出し時に一度だけ読み込む
+    global _whois_cache_loaded
+    with _whois_lock:
+        if _whois_cache_loaded:
+            return
+        _whois_cache_loaded = True
+        try:
+            with open(_whois_cache_path(), "r", encoding="utf-8") as f:
+                _WHOIS_CACHE.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+
+def _save_whois_cache() -> None:
+    # 書き込み途中のファイルが読まれないよう、一時ファイル経由で置き換える
+    cache_path = _whois_cache_path()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((whois_server, whois_port))
-        sock.send((ip_address + "\r\n").encode("utf-8"))
-
-        data = b""
-        while True:
-            buffer = sock.recv(4096)
-            if not buffer:
-                break
-            data += buffer
-    except ConnectionResetError:
-        logger.warning("プロバイダ取得エラー：Whoisサーバーによって接続がリセットされました。")
-        time.sleep(5)
-        return "取得失敗（Whoisサーバーからの拒否）"
-    except socket.error as e:
-        logger.warning(f"プロバイダ取得エラー：ソケットエラーが発生しました: {e}")
-        return "取得失敗（ソケットエラー）"
-    finally:
-        sock.close()
-        time.sleep(5)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(_WHOIS_CACHE, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"WHOISキャッシュの保存に失敗しました: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _query_jpnic_whois(ip_address):
+    # 取得済みのIPアドレスは、WHOISサーバーに問い合わせずキャッシュから返す
+    _load_whois_cache()
+    if ip_address in _WHOIS_CACHE:
+        return _WHOIS_CACHE[ip_address]
+
+    # 並列に解決していても、WHOISサーバーへの問い合わせは従来どおり1本ずつ行う
+    with _whois_query_lock:
+        # ロック待ちの間に、他のスレッドが同じIPを解決済みの場合がある
+        if ip_address in _WHOIS_CACHE:
+            return _WHOIS_CACHE[ip_address]
+
+        # JPNICのWHOISサービスに接続
+        whois_server = "whois.nic.ad.jp"
+        whois_port = 43
+
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(5.0)  # 応答しないWHOISサーバーでクローラを停止させない
+            sock.connect((whois_server, whois_port))
+            sock.send((ip_address + "\r\n").encode("utf-8"))
+
+            data = b""
+            while True:
+                buffer = sock.recv(4096)
+                if not buffer:
+                    break
+                data += buffer
+        except ConnectionResetError:
+            logger.warning("プロバイダ取得エラー：Whoisサーバーによって接続がリセットされました。")
+            time.sleep(5)
+            return "取得失敗（Whoisサーバーからの拒否）"
+        except socket.timeout:
+            logger.warning("プロバイダ取得エラー：Whoisサーバーへの接続がタイムアウトしました。")
+            return "取得失敗（タイムアウト）"
+        except socket.error as e:
+            logger.warning(f"プロバイダ取得エラー：ソケットエラーが発生しました: {e}")
+            return "取得失敗（ソケットエラー）"
+        finally:
+            sock.close()
+            time.sleep(5)
 
     result = data.decode("iso-2022-jp", "ignore")
 
-    match = re.search(r"\[組織名\]\s+(.+)", result)
+    match = _ORG_RE.search(result)
     if match:
         provider = match.group(1)
         if provider == "":
@@ -740,6 +943,12 @@ def _query_jpnic_whois(ip_address):
         else:
             # '株式会社'を含む場合は削除する
             provider = provider.replace("株式会社", "")
-        return provider
     else:
-        return "取得失敗(JPNIC管理外)"
+        provider = "取得失敗(JPNIC管理外)"
+
+    # 組織名は巡回期間中に変わらないため、結果をキャッシュして次回以降の問い合わせを省く
+    with _whois_lock:
+        _WHOIS_CACHE[ip_address] = provider
+        _save_whois_cache()
+
+    return provider